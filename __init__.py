@@ -4,12 +4,18 @@
 # Copyright (c) 2023 Valentin Maerten
 
 from __future__ import annotations
+import os
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 from pathlib import Path
 from time import time
-from typing import Union, List
+from typing import Union, List, Iterable, Iterator
 from shutil import which
 from sys import platform
-from xml.etree import ElementTree
+try:
+    from lxml import etree as ElementTree
+except ImportError:
+    from xml.etree import ElementTree
 from albert import *
 
 md_iid = "5.0"
@@ -22,9 +28,35 @@ md_readme_url = "https://github.com/albertlauncher/albert-plugin-python-jetbrain
 md_authors = ["@tomsquest", "@vmaerten", "@ManuelSchneid3r", "@d3v2a"]
 md_maintainers = ["@tomsquest", "@vmaerten", "@albi005"]
 
+_LAST_OPENED = attrgetter("last_opened")
+_USER_HOME = str(Path.home())
+_CONFIG_DIR = os.path.join(_USER_HOME, "Library/Application Support" if platform == "darwin" else ".config")
+
+# Parsed projects per recent projects file, keyed by path and invalidated by (st_mtime_ns, st_size)
+_project_cache: dict[str, tuple[int, int, list[Project]]] = {}
+
+# Subdirectory names per vendor config directory, invalidated by the directory's st_mtime_ns
+_subdirs_cache: dict[str, tuple[int, list[str]]] = {}
+
+
+def _list_subdirs(parent_dir: str) -> list[str]:
+    try:
+        mtime = os.stat(parent_dir).st_mtime_ns
+        cached = _subdirs_cache.get(parent_dir)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with os.scandir(parent_dir) as it:
+            names = [e.name for e in it if e.is_dir()]
+    except OSError:
+        return []
+    _subdirs_cache[parent_dir] = (mtime, names)
+    return names
+
 
 class Project:
 
+    __slots__ = ("name", "path", "last_opened", "ide")
+
     def __init__(self, name: str, path: str, last_opened: int, ide: JetBrainsIde):
         self.name = name
         self.path = path
@@ -34,9 +66,12 @@ class Project:
 
 class JetBrainsIde:
 
+    _recent_projects_file_name = "recentProjects.xml"
+    _component_name = "RecentProjectsManager"
+
     def __init__(self, name: str, icon: Path, config_dir_prefixes: list[str], binaries: list[str]):
         self.name = name
-        self.icon = icon
+        self.icon = str(icon)
         self.config_dir_prefixes = config_dir_prefixes
         self.binary = self._find_binary(binaries)
 
@@ -48,43 +83,64 @@ class JetBrainsIde:
         return None
 
     @staticmethod
-    def _config_dir() -> Path:
-        if platform == "darwin":
-            return Path.home() / "Library" / "Application Support"
-        else:
-            return Path.home() / ".config"
-
-    def _get_recent_projects_entries(self, config_dir: Path) -> list[ElementTree.Element]:
-        recent_projects_file = Path(config_dir) / "options" / "recentProjects.xml"
-        root = ElementTree.parse(recent_projects_file).getroot()
-        return root.findall(".//component[@name='RecentProjectsManager']//entry[@key]")
+    def _get_open_timestamp(entry: ElementTree.Element) -> Union[int, None]:
+        for option in entry.iter("option"):
+            if option.get("name") == "projectOpenTimestamp":
+                try:
+                    return int(option.get("value"))
+                except (TypeError, ValueError):
+                    return None
+        return None
 
-    def _parse_project_entries(self, project_entries: list[ElementTree.Element]) -> list[Project]:
+    def _get_recent_projects_entries(self, recent_projects_file: str) -> Iterator[tuple[str, Union[int, None]]]:
+        # Stream the file and clear elements once read, so the full tree is never held in memory
+        in_component = False
+        for event, elem in ElementTree.iterparse(recent_projects_file, events=("start", "end")):
+            if elem.tag == "component":
+                if event == "start":
+                    in_component = elem.get("name") == self._component_name
+                else:
+                    in_component = False
+                    elem.clear()
+            elif event == "end" and in_component and elem.tag == "entry" and "key" in elem.attrib:
+                yield elem.attrib["key"], self._get_open_timestamp(elem)
+                elem.clear()
+
+    def _parse_project_entries(self, project_entries: Iterable[tuple[str, Union[int, None]]]) -> list[Project]:
         projects = []
-        for entry in project_entries:
-            project_path = entry.attrib["key"]
-            project_path = project_path.replace("$USER_HOME$", str(Path.home()))
-            project_name = Path(project_path).name
-            files = Path(project_path + "/.idea").glob("*.iml")
-            tag_opened = entry.find(".//option[@name='projectOpenTimestamp']")
-            last_opened = tag_opened.attrib["value"] if tag_opened is not None and "value" in tag_opened.attrib else None
-
-            if project_path and last_opened:
-                projects.append(Project(name=project_name, path=project_path, last_opened=int(last_opened), ide=self))
-            for file in files:
-                name = file.name.replace(".iml", "")
-                if name != project_name:
-                    projects.append(Project(name=name, path=project_path, last_opened=int(last_opened), ide=self))
+        for project_path, last_opened in project_entries:
+            if not project_path or last_opened is None:
+                continue
+            project_path = project_path.replace("$USER_HOME$", _USER_HOME)
+            project_name = os.path.basename(project_path.rstrip("/"))
+            try:
+                with os.scandir(project_path + "/.idea") as it:
+                    iml_names = [e.name[:-4] for e in it if e.name.endswith(".iml") and e.is_file()]
+            except OSError:
+                iml_names = []
+
+            # One project per distinct name, the directory name first
+            for name in dict.fromkeys([project_name, *iml_names]):
+                projects.append(Project(name=name, path=project_path, last_opened=last_opened, ide=self))
 
         return projects
 
     def list_projects(self) -> List[Project]:
         for config_dir_prefix in self.config_dir_prefixes:
-            dirs = list(self._config_dir().glob(f"{config_dir_prefix}*/"))
-            if dirs:
+            parent, prefix = os.path.split(config_dir_prefix)
+            parent_dir = os.path.join(_CONFIG_DIR, parent)
+            names = [name for name in _list_subdirs(parent_dir) if name.startswith(prefix)]
+            if names:
+                recent_projects_file = os.path.join(parent_dir, max(names), "options", self._recent_projects_file_name)
                 try:
-                    recent_projects_entries = self._get_recent_projects_entries(sorted(dirs)[-1])
-                    return self._parse_project_entries(recent_projects_entries)
+                    stat = os.stat(recent_projects_file)
+                    cached = _project_cache.get(recent_projects_file)
+                    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                        return cached[2]
+                    recent_projects_entries = self._get_recent_projects_entries(recent_projects_file)
+                    projects = self._parse_project_entries(recent_projects_entries)
+                    _project_cache[recent_projects_file] = (stat.st_mtime_ns, stat.st_size, projects)
+                    return projects
                 except (ElementTree.ParseError, FileNotFoundError):
                     return []
         return []
@@ -171,12 +227,10 @@ def editors(icons_dir: Path) -> List[JetBrainsIde]:
 
 class Rider(JetBrainsIde):
 
-    def _get_recent_projects_entries(self, config_dir: Path) -> list[ElementTree.Element]:
-        # Rider calls recentProjects.xml -> recentSolutions.xml and
-        # in it RecentProjectsManager -> RiderRecentProjectsManager
-        recent_projects_file = Path(config_dir) / "options" / "recentSolutions.xml"
-        root = ElementTree.parse(recent_projects_file).getroot()
-        return root.findall(".//component[@name='RiderRecentProjectsManager']//entry[@key]")
+    # Rider calls recentProjects.xml -> recentSolutions.xml and
+    # in it RecentProjectsManager -> RiderRecentProjectsManager
+    _recent_projects_file_name = "recentSolutions.xml"
+    _component_name = "RiderRecentProjectsManager"
 
 
 class Plugin(PluginInstance, GlobalQueryHandler):
@@ -217,25 +271,27 @@ class Plugin(PluginInstance, GlobalQueryHandler):
         now = time()
         if now - self.last_projects_update > 60:
             self.last_projects_update = now
-            self.projects = [
-                project
-                for editor in self.editors
-                for project in editor.list_projects()
-                if Path(project.path).exists()
-            ]
+            # The editors read independent files, list them concurrently
+            with ThreadPoolExecutor(max_workers=min(8, len(self.editors) or 1)) as executor:
+                self.projects = [
+                    project
+                    for projects in executor.map(lambda editor: editor.list_projects(), self.editors)
+                    for project in projects
+                    if os.path.exists(project.path)
+                ]
             self.last_projects_update = now
 
     def items(self, ctx):
         self._update_projects()
 
         matcher = Matcher(ctx.query, MatchConfig(fuzzy=self.fuzzy))
-        matches = [
-            project for project in self.projects
-            if matcher.match(*[project.name, project.path] if self._match_path else [project.name])
-        ]
+        if self._match_path:
+            matches = [project for project in self.projects if matcher.match(project.name, project.path)]
+        else:
+            matches = [project for project in self.projects if matcher.match(project.name)]
 
         # sort by last opened
-        matches.sort(key=lambda p: p.last_opened, reverse=True)
+        matches.sort(key=_LAST_OPENED, reverse=True)
 
         yield [self._make_item(project) for project in matches]
 
@@ -254,7 +310,7 @@ class Plugin(PluginInstance, GlobalQueryHandler):
             text=project.name,
             subtext=f"{project.ide.name} · {project.path}" if show_cat else project.path,
             input_action_text=project.name,
-            icon_factory=lambda: Icon.image(str(project.ide.icon)),
+            icon_factory=lambda: Icon.image(project.ide.icon),
             actions=[
                 Action(
                     "Open",